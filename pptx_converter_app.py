@@ -28,41 +28,92 @@ Streamlit: https://share.streamlit.io/
 Github: https://github.com/sharaz1990/pptx-converter-app
 """
 import streamlit as st
-from pptx import Presentation
-import tempfile
 import os
-import zipfile
-from io import BytesIO
+import re
+from io import StringIO
 
 # Security Configuration
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB limit
 ALLOWED_EXTENSIONS = ['.pptx']
+REQUIRED_PPTX_PARTS = frozenset({'[Content_Types].xml', 'ppt/presentation.xml'})
+SUMMARY_MARKER = "\n\n[... content truncated for summary ...]\n\n"
 
-def validate_file_basic(uploaded_file):
-    """Basic file security validation without external dependencies"""
+# Limits to prevent resource exhaustion
+MAX_SLIDES = 200
+MAX_TEXT_PER_SLIDE = 50000
+MAX_SHAPES_PER_SLIDE = 100
+
+# Characters and sequences not allowed in uploaded file names
+_BAD_NAME = re.compile(r'[\\/<>|:*?"]|\.\.')
+
+# Unsafe code points removed from slide text (Unicode 14 categories): control
+# characters except whitespace such as \t \n \r (Cc), format characters like
+# bidi overrides, zero-width spaces and the BOM (Cf), surrogates (Cs) and
+# private-use characters (Co)
+_UNSAFE_CHARS = re.compile(
+    r'[\x00-\x08\x0e-\x1b\x7f-\x84\x86-\x9f'
+    r'\xad\u0600-\u0605\u061c\u06dd\u070f\u0890\u0891\u08e2\u180e'
+    r'\u200b-\u200f\u202a-\u202e\u2060-\u2064\u2066-\u206f'
+    r'\ud800-\uf8ff\ufeff\ufff9-\ufffb'
+    r'\U000110bd\U000110cd\U00013430-\U00013438\U0001bca0-\U0001bca3'
+    r'\U0001d173-\U0001d17a\U000e0001\U000e0020-\U000e007f'
+    r'\U000f0000-\U000ffffd\U00100000-\U0010fffd]'
+)
+
+# OOXML tags used to read slide text straight from the XML
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_TEXT_BODY_TAGS = (_P + 'txBody', _A + 'txBody')
+_PARAGRAPH_TAG = _A + 'p'
+_TEXT_TAG = _A + 't'
+_LINE_BREAK_TAG = _A + 'br'
+_MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+_FALLBACK_TAG = _MC + 'Fallback'
+# Top-level shapes in p:spTree; a table or group counts as one shape
+_SHAPE_TAGS = tuple(
+    _P + tag for tag in ('sp', 'grpSp', 'graphicFrame', 'cxnSp', 'pic', 'contentPart')
+) + (_MC + 'AlternateContent',)
+
+@st.cache_resource(show_spinner=False)
+def _load_presentation_class():
+    """Import python-pptx on first use
+    
+    Deferred until a file is processed, so reruns without an upload
+    never pay for importing python-pptx and lxml.
+    """
+    from pptx import Presentation
+    
+    return Presentation
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def validate_file_basic(_file, file_id, name, size):
+    """Basic file security validation without external dependencies
+    
+    Cached on the upload's file_id so Streamlit reruns reuse the result;
+    the stream itself is read in place and excluded from hashing.
+    """
+    import zipfile
+    
     errors = []
     
     # 1. File size check
-    if uploaded_file.size > MAX_FILE_SIZE:
+    if size > MAX_FILE_SIZE:
         errors.append(f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB")
     
     # 2. File extension check
-    file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+    file_extension = os.path.splitext(name)[1].lower()
     if file_extension not in ALLOWED_EXTENSIONS:
         errors.append(f"Invalid file type. Only .pptx files allowed")
     
     # 3. Basic PPTX structure validation (PPTX files are ZIP archives)
     try:
-        file_bytes = uploaded_file.getvalue()
-        with zipfile.ZipFile(BytesIO(file_bytes), 'r') as zip_file:
+        # ZipFile seeks to the central directory, so only the index is read
+        _file.seek(0)
+        with zipfile.ZipFile(_file, 'r') as zip_file:
             # Check for essential PPTX components
-            required_files = ['[Content_Types].xml', 'ppt/presentation.xml']
-            zip_contents = zip_file.namelist()
-            
-            for required_file in required_files:
-                if required_file not in zip_contents:
-                    errors.append("File doesn't appear to be a valid PPTX format")
-                    break
+            missing = REQUIRED_PPTX_PARTS - set(zip_file.namelist())
+            if missing:
+                errors.append("File doesn't appear to be a valid PPTX format")
                     
     except zipfile.BadZipFile:
         errors.append("File is corrupted or not a valid PPTX file")
@@ -70,61 +121,97 @@ def validate_file_basic(uploaded_file):
         errors.append("Unable to validate file structure")
     
     # 4. File name sanitization
-    dangerous_chars = ['/', '\\', '..', '<', '>', '|', ':', '*', '?', '"']
-    if any(char in uploaded_file.name for char in dangerous_chars):
+    if _BAD_NAME.search(name):
         errors.append("Invalid characters in filename")
     
     # 5. Minimum file size check (empty or too small files)
-    if uploaded_file.size < 1000:  # Less than 1KB is suspicious for PPTX
+    if size < 1000:  # Less than 1KB is suspicious for PPTX
         errors.append("File is too small to be a valid PPTX")
     
     return errors
 
-def safe_text_extraction(uploaded_file):
-    """Safely extract text with enhanced error handling"""
-    temp_file_path = None
-    try:
-        # Create temporary file for secure processing
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pptx') as temp_file:
-            temp_file.write(uploaded_file.getvalue())
-            temp_file_path = temp_file.name
+def _iter_text_bodies(slide_element):
+    """Yield the text bodies of a slide's shapes, or None once MAX_SHAPES_PER_SLIDE is passed"""
+    sp_tree = slide_element.cSld.spTree
+    for shape_count, shape in enumerate(sp_tree.iterchildren(*_SHAPE_TAGS), 1):
+        if shape_count > MAX_SHAPES_PER_SLIDE:
+            yield None
+            return
         
-        # Process the file with timeout protection
-        ppt = Presentation(temp_file_path)
-        extracted_text = []
+        for text_body in shape.iter(*_TEXT_BODY_TAGS):
+            # mc:AlternateContent holds the same shapes twice; read mc:Choice only
+            if next(text_body.iterancestors(_FALLBACK_TAG), None) is not None:
+                continue
+            yield text_body
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def safe_text_extraction(_file, file_id):
+    """Safely extract text with enhanced error handling
+    
+    Cached on the upload's file_id so Streamlit reruns reuse the result;
+    the stream itself is read in place and excluded from hashing.
+    """
+    Presentation = _load_presentation_class()
+    
+    try:
+        # Process the upload stream in memory without copying it
+        _file.seek(0)
+        ppt = Presentation(_file)
+        # Everything is written into one buffer, no intermediate strings
+        buf = StringIO()
         slide_count = 0
         
-        # Limits to prevent resource exhaustion
-        MAX_SLIDES = 200
-        MAX_TEXT_PER_SLIDE = 50000
-        MAX_SHAPES_PER_SLIDE = 100
-        
         for i, slide in enumerate(ppt.slides):
+            if i:
+                buf.write("\n")  # Blank line between slides
             if i >= MAX_SLIDES:
-                extracted_text.append(f"\n⚠️ Processing stopped at {MAX_SLIDES} slides for performance\n")
+                buf.write(f"\n⚠️ Processing stopped at {MAX_SLIDES} slides for performance\n")
                 break
                 
             slide_count += 1
-            slide_text = f"\n--- Slide {slide_count} ---\n"
-            shape_count = 0
+            # Header written in pieces; module-level templates would be rebuilt on every rerun
+            buf.write("\n--- Slide ")
+            buf.write(str(slide_count))
+            buf.write(" ---\n")
+            slide_chars = 0
             
-            for shape in slide.shapes:
-                shape_count += 1
-                if shape_count > MAX_SHAPES_PER_SLIDE:
-                    slide_text += "⚠️ Too many shapes in slide, some content skipped\n"
+            # Read text bodies from the slide XML instead of building shape objects
+            for text_body in _iter_text_bodies(slide._element):
+                if text_body is None:
+                    buf.write("⚠️ Too many shapes in slide, some content skipped\n")
                     break
-                    
-                if hasattr(shape, "text") and shape.text.strip():
-                    # Limit and sanitize text
-                    text_content = shape.text[:MAX_TEXT_PER_SLIDE]
+                
+                # Only <a:p>, <a:br> and <a:t> nodes are visited; each paragraph
+                # starts a new line and line breaks become \v as in python-pptx
+                parts = []
+                for node in text_body.iter(_PARAGRAPH_TAG, _LINE_BREAK_TAG, _TEXT_TAG):
+                    if node.tag == _PARAGRAPH_TAG:
+                        parts.append("\n")
+                    elif node.tag == _LINE_BREAK_TAG:
+                        parts.append("\v")
+                    elif node.text:
+                        parts.append(node.text)
+                shape_text = "".join(parts)[1:]
+                if shape_text.strip():
+                    # Text limit applies to the whole slide, not each shape
+                    remaining = MAX_TEXT_PER_SLIDE - slide_chars
+                    if remaining <= 0:
+                        buf.write("⚠️ Too much text in slide, some content skipped\n")
+                        break
+                    # Cut before sanitizing so an oversized shape is never fully processed
+                    truncated = len(shape_text) > remaining
+                    if truncated:
+                        shape_text = shape_text[:remaining]
                     # Remove control characters but keep international characters
-                    sanitized_text = ''.join(char for char in text_content 
-                                           if char.isprintable() or char.isspace())
-                    slide_text += sanitized_text + "\n"
-            
-            extracted_text.append(slide_text)
+                    sanitized_text = _UNSAFE_CHARS.sub('', shape_text)
+                    buf.write(sanitized_text)
+                    buf.write("\n")
+                    slide_chars += len(sanitized_text)
+                    if truncated:
+                        buf.write("⚠️ Too much text in slide, some content skipped\n")
+                        break
         
-        return "\n".join(extracted_text), slide_count, None
+        return buf.getvalue(), slide_count, None
     
     except Exception as e:
         error_msg = str(e)
@@ -132,14 +219,10 @@ def safe_text_extraction(uploaded_file):
         if "temp" in error_msg.lower() or "/" in error_msg or "\\" in error_msg:
             return "", 0, "Error: File processing failed due to security restrictions"
         return "", 0, f"Error: {error_msg[:100]}"  # Limit error message length
-    
-    finally:
-        # Always clean up temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass  # Fail silently on cleanup error
+
+def _make_summary(text):
+    """Build the summary download: the start and end of the extracted text"""
+    return "".join((text[:500], SUMMARY_MARKER, text[-300:])).encode("utf-8")
 
 # Streamlit UI
 st.title("🔒 Secure PPTX to Text Converter")
@@ -158,7 +241,9 @@ uploaded_file = st.file_uploader(
 if uploaded_file is not None:
     # Perform security validation
     with st.spinner("🔍 Validating file security..."):
-        security_errors = validate_file_basic(uploaded_file)
+        security_errors = validate_file_basic(
+            uploaded_file, uploaded_file.file_id, uploaded_file.name, uploaded_file.size
+        )
     
     if security_errors:
         st.error("❌ **Security Validation Failed**")
@@ -179,7 +264,7 @@ if uploaded_file is not None:
         # Processing button
         if st.button("🔄 **Extract Text Securely**", type="primary"):
             with st.spinner("🔒 Processing your presentation securely..."):
-                extracted_text, slide_count, error = safe_text_extraction(uploaded_file)
+                extracted_text, slide_count, error = safe_text_extraction(uploaded_file, uploaded_file.file_id)
             
             if error:
                 st.error(f"❌ **Processing Error**: {error}")
@@ -206,11 +291,14 @@ if uploaded_file is not None:
                 # Download section
                 st.subheader("💾 Download Options")
                 
+                # Passed as bytes; Streamlit would otherwise encode the str itself, at the same cost
+                extracted_bytes = extracted_text.encode("utf-8")
+                
                 col1, col2 = st.columns(2)
                 with col1:
                     st.download_button(
                         label="📥 Download as TXT",
-                        data=extracted_text,
+                        data=extracted_bytes,
                         file_name=f"extracted_{uploaded_file.name.replace('.pptx', '')}.txt",
                         mime="text/plain",
                         help="Download the extracted text as a plain text file"
@@ -219,10 +307,9 @@ if uploaded_file is not None:
                 with col2:
                     # Optional: Create a summary
                     if char_count > 1000:
-                        summary_text = extracted_text[:500] + "\n\n[... content truncated for summary ...]\n\n" + extracted_text[-300:]
                         st.download_button(
                             label="📄 Download Summary",
-                            data=summary_text,
+                            data=_make_summary(extracted_text),
                             file_name=f"summary_{uploaded_file.name.replace('.pptx', '')}.txt",
                             mime="text/plain",
                             help="Download a truncated version showing beginning and end"
@@ -262,12 +349,12 @@ with st.expander("🛡️ Security & Privacy Information"):
     **Security Features:**
     - ✅ File type validation and structure verification
     - ✅ Size limits (50MB maximum)
-    - ✅ Temporary processing (files deleted immediately)
+    - ✅ In-memory processing (files never written to disk)
     - ✅ Content sanitization and limits
     - ✅ HTTPS encryption for all data transmission
     
     **Privacy Commitment:**
-    - Files are processed temporarily and deleted immediately
+    - Files are processed in memory and discarded after use
     - No permanent storage of your documents
     - No logging of file contents
     - Secure processing environment